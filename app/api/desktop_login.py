@@ -1,25 +1,25 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Form, HTTPException, status
+from functools import lru_cache, partial
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Form, HTTPException, Query, status
 from fastapi.responses import HTMLResponse, RedirectResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from urllib.parse import urlencode
 
 from ..db import get_db
+from ..html_utils import escape_if_needed
 from ..models import User
-from ..security import verify_password
-from ..desktop_auth import store
+from ..schemas import NormalizedEmail
+from ..security import run_argon2_bound, verify_password
+from ..desktop_auth import URLSAFE_TOKEN_PATTERN, store
 
 router = APIRouter(tags=["desktop-login"])
 
 
-def _page(error: str | None, state: str, redirect_uri: str, code_challenge: str, prefill: bool) -> str:
-    # Minimal single-file HTML with small CSS + JS.
-    # Includes requested: Example button, show/hide password, placeholder reset/email text.
-    email_prefill = "example@demo.local" if prefill else ""
-    pw_prefill = ""  # we fill password via Example button JS (requested: hidden inside Example button)
-    err_html = f"<div class='error'>{error}</div>" if error else ""
-    return f"""<!doctype html>
+# Static markup is built once at import; only the placeholders are filled per request.
+_PAGE_TEMPLATE = """<!doctype html>
 <html>
 <head>
   <meta charset="utf-8" />
@@ -124,34 +124,72 @@ def _page(error: str | None, state: str, redirect_uri: str, code_challenge: str,
 </body>
 </html>"""
 
+
+def _page(error: str | None, state: str, redirect_uri: str, code_challenge: str, prefill: bool) -> str:
+    # Minimal single-file HTML with small CSS + JS.
+    # Includes requested: Example button, show/hide password, placeholder reset/email text.
+    email_prefill = "example@demo.local" if prefill else ""
+    pw_prefill = ""  # we fill password via Example button JS (requested: hidden inside Example button)
+    err_html = f"<div class='error'>{error}</div>" if error else ""
+    return _PAGE_TEMPLATE.format_map(
+        {
+            "err_html": err_html,
+            "state": state,
+            # state/code_challenge are pattern-checked at ingress; only redirect_uri may need escaping.
+            "redirect_uri": escape_if_needed(redirect_uri),
+            "code_challenge": code_challenge,
+            "email_prefill": email_prefill,
+            "pw_prefill": pw_prefill,
+        }
+    )
+
+
+@lru_cache(maxsize=512)
+def _login_page_cached(state: str, redirect_uri: str, code_challenge: str, prefill: bool) -> bytes:
+    # The error-free page is a pure function of its inputs; reloads reuse the encoded body.
+    return _page(error=None, state=state, redirect_uri=redirect_uri, code_challenge=code_challenge, prefill=prefill).encode("utf-8")
+
+
 @router.get("/desktop/login", response_class=HTMLResponse)
-def desktop_login_page(state: str, redirect_uri: str, code_challenge: str, prefill: int = 0):
+def desktop_login_page(
+    state: str = Query(..., pattern=URLSAFE_TOKEN_PATTERN),
+    redirect_uri: str = Query(...),
+    code_challenge: str = Query(..., pattern=URLSAFE_TOKEN_PATTERN),
+    prefill: int = 0,
+):
     # Register pending login request (state + redirect + challenge).
     store.register_pending(state=state, redirect_uri=redirect_uri, code_challenge=code_challenge)
-    return _page(error=None, state=state, redirect_uri=redirect_uri, code_challenge=code_challenge, prefill=bool(prefill))
+    return HTMLResponse(_login_page_cached(state, redirect_uri, code_challenge, bool(prefill)))
 
 
 @router.post("/desktop/login")
-def desktop_login_submit(
-    email: str = Form(...),
+async def desktop_login_submit(
+    email: Annotated[NormalizedEmail, Form()],
     password: str = Form(...),
-    state: str = Form(...),
+    state: str = Form(..., pattern=URLSAFE_TOKEN_PATTERN),
     redirect_uri: str = Form(...),
-    code_challenge: str = Form(...),
+    code_challenge: str = Form(..., pattern=URLSAFE_TOKEN_PATTERN),
     db: Session = Depends(get_db),
 ):
+    # The sync body (DB, store, Argon2) runs on the Argon2 limiter, not the default threadpool.
+    return await run_argon2_bound(partial(_login_submit, email, password, state, redirect_uri, code_challenge, db))
+
+
+def _login_submit(email: str, password: str, state: str, redirect_uri: str, code_challenge: str, db: Session):
     # Ensure pending request exists and parameters match.
     pending = store.get_pending(state)
     if not pending or pending.redirect_uri != redirect_uri or pending.code_challenge != code_challenge:
         # Render again with error
         return HTMLResponse(_page("Invalid login session. Please restart login from the desktop app.", state, redirect_uri, code_challenge, prefill=False), status_code=400)
 
-    user = db.query(User).filter(User.email == email.strip().lower()).first()
+    # Only the two columns used below; the lookup goes through the unique index on email.
+    user = db.execute(select(User.id, User.password_hash).where(User.email == email)).first()
     if not user or not verify_password(password, user.password_hash):
         return HTMLResponse(_page("Invalid credentials.", state, redirect_uri, code_challenge, prefill=False), status_code=401)
 
     # Issue one-time auth code and redirect back to the desktop callback URL.
     auth_code = store.issue_code(state=state, user_id=user.id)
 
-    qs = urlencode({"code": auth_code.code, "state": state})
+    # Both values are URL-safe already: the code is unpadded base64url and state is pattern-checked at ingress.
+    qs = f"code={auth_code.code}&state={state}"
     return RedirectResponse(url=f"{redirect_uri}?{qs}", status_code=302)
@@ -2,15 +2,21 @@ from __future__ import annotations
 
 import datetime as dt
 import html
+import uuid
+from functools import partial
+from typing import Annotated
 
 from fastapi import APIRouter, Depends, Form, Request, status
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, Response
+from sqlalchemy import delete, select
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
 from ..db import get_db
+from ..html_utils import escape_if_needed
 from ..models import RegistrationSession, User, UserProfile
-from ..security import hash_password
+from ..schemas import NormalizedEmail
+from ..security import hash_password, run_argon2_bound
 from ..settings import settings
 
 try:
@@ -22,39 +28,55 @@ except Exception:  # pragma: no cover
 router = APIRouter(tags=["desktop-register"])
 
 
-def _wrap_page(*, title: str, body_html: str) -> str:
-    safe_title = html.escape(title)
-    return f"""<!doctype html>
+# Static page chrome, built once at import and concatenated around each body.
+_HEAD_PREFIX = """<!doctype html>
 <html>
 <head>
   <meta charset="utf-8" />
   <meta name="viewport" content="width=device-width, initial-scale=1"/>
-  <title>{safe_title}</title>
+  <title>"""
+_HEAD_SUFFIX = """</title>
   <style>
-    body {{ font-family: system-ui, -apple-system, Segoe UI, Roboto, Arial, sans-serif; background:#0b1220; color:#e6eefc; margin:0; }}
-    .wrap {{ max-width:760px; margin:48px auto; padding:22px; background:rgba(255,255,255,0.04); border:1px solid rgba(255,255,255,0.10); border-radius:14px; }}
-    h1 {{ margin:0 0 8px; font-size:22px; }}
-    h2 {{ margin:18px 0 8px; font-size:16px; color:#bcd0ff; }}
-    .muted {{ color:#9fb2da; font-size:13px; line-height:1.35; }}
-    label {{ display:block; margin:12px 0 6px; color:#bcd0ff; }}
-    input {{ width:100%; padding:10px 12px; border-radius:10px; border:1px solid rgba(255,255,255,0.12); background:rgba(0,0,0,0.25); color:#e6eefc; }}
-    .row {{ display:flex; gap:10px; margin-top:14px; flex-wrap:wrap; }}
-    button, a.btn {{ padding:10px 12px; border-radius:10px; border:1px solid rgba(255,255,255,0.14); background:rgba(0,150,255,0.18); color:#e6eefc; cursor:pointer; text-decoration:none; display:inline-block; }}
-    button.secondary, a.btn.secondary {{ background:rgba(255,255,255,0.06); }}
-    .error {{ margin:12px 0; padding:10px 12px; border-radius:10px; background:rgba(255,0,0,0.10); border:1px solid rgba(255,0,0,0.25); }}
-    .card {{ margin-top:14px; padding:12px; border-radius:10px; background:rgba(0,0,0,0.22); border:1px solid rgba(255,255,255,0.10); }}
-    .kv {{ display:grid; grid-template-columns: 160px 1fr; gap:8px 12px; font-size:14px; }}
-    .kv div {{ padding:2px 0; }}
+    body { font-family: system-ui, -apple-system, Segoe UI, Roboto, Arial, sans-serif; background:#0b1220; color:#e6eefc; margin:0; }
+    .wrap { max-width:760px; margin:48px auto; padding:22px; background:rgba(255,255,255,0.04); border:1px solid rgba(255,255,255,0.10); border-radius:14px; }
+    h1 { margin:0 0 8px; font-size:22px; }
+    h2 { margin:18px 0 8px; font-size:16px; color:#bcd0ff; }
+    .muted { color:#9fb2da; font-size:13px; line-height:1.35; }
+    label { display:block; margin:12px 0 6px; color:#bcd0ff; }
+    input { width:100%; padding:10px 12px; border-radius:10px; border:1px solid rgba(255,255,255,0.12); background:rgba(0,0,0,0.25); color:#e6eefc; }
+    .row { display:flex; gap:10px; margin-top:14px; flex-wrap:wrap; }
+    button, a.btn { padding:10px 12px; border-radius:10px; border:1px solid rgba(255,255,255,0.14); background:rgba(0,150,255,0.18); color:#e6eefc; cursor:pointer; text-decoration:none; display:inline-block; }
+    button.secondary, a.btn.secondary { background:rgba(255,255,255,0.06); }
+    .error { margin:12px 0; padding:10px 12px; border-radius:10px; background:rgba(255,0,0,0.10); border:1px solid rgba(255,0,0,0.25); }
+    .card { margin-top:14px; padding:12px; border-radius:10px; background:rgba(0,0,0,0.22); border:1px solid rgba(255,255,255,0.10); }
+    .kv { display:grid; grid-template-columns: 160px 1fr; gap:8px 12px; font-size:14px; }
+    .kv div { padding:2px 0; }
   </style>
 </head>
 <body>
   <div class="wrap">
-    {body_html}
+    """
+_TAIL = """
   </div>
 </body>
 </html>"""
 
 
+def _wrap_page(*, title: str, body_html: str) -> str:
+    return _HEAD_PREFIX + html.escape(title) + _HEAD_SUFFIX + body_html + _TAIL
+
+
+_EMAIL_STEP_URL = "/desktop/register/email?reg="
+_TWO_FA_STEP_URL = "/desktop/register/2fa?reg="
+_PAYMENT_STEP_URL = "/desktop/register/payment?reg="
+_REVIEW_STEP_URL = "/desktop/register/review?reg="
+
+
+def _see_other(url: str) -> Response:
+    # Bare 303: no body, and no re-quoting of URLs we built ourselves or got from Stripe.
+    return Response(status_code=status.HTTP_303_SEE_OTHER, headers={"location": url})
+
+
 def _error_box(msg: str | None) -> str:
     if not msg:
         return ""
@@ -62,34 +84,33 @@ def _error_box(msg: str | None) -> str:
 
 
 def _safe(v: str | None) -> str:
-    return html.escape(v or "")
+    return escape_if_needed(v or "")
 
 
-def _data_page(*, error: str | None, values: dict[str, str] | None = None) -> str:
-    values = values or {}
-    body = f"""
+_DATA_FIELDS = ("first_name", "last_name", "address", "country", "email")
+_DATA_BODY_TEMPLATE = """
     <h1>Registration</h1>
     <div class="muted">Step 1/5: Data</div>
-    {_error_box(error)}
+    {error_html}
     <form method="post" action="/desktop/register">
       <div class="row">
         <button type="button" class="secondary" id="example">Example</button>
       </div>
 
       <label>First name</label>
-      <input id="first_name" name="first_name" placeholder="First name" value="{_safe(values.get('first_name'))}" required />
+      <input id="first_name" name="first_name" placeholder="First name" value="{first_name}" required />
 
       <label>Last name</label>
-      <input id="last_name" name="last_name" placeholder="Last name" value="{_safe(values.get('last_name'))}" required />
+      <input id="last_name" name="last_name" placeholder="Last name" value="{last_name}" required />
 
       <label>Address</label>
-      <input id="address" name="address" placeholder="Address" value="{_safe(values.get('address'))}" required />
+      <input id="address" name="address" placeholder="Address" value="{address}" required />
 
       <label>Country</label>
-      <input id="country" name="country" placeholder="Country" value="{_safe(values.get('country'))}" required />
+      <input id="country" name="country" placeholder="Country" value="{country}" required />
 
       <label>Email</label>
-      <input id="email" name="email" type="email" placeholder="Email" value="{_safe(values.get('email'))}" required />
+      <input id="email" name="email" type="email" placeholder="Email" value="{email}" required />
 
       <label>Password</label>
       <input id="password" name="password" type="password" placeholder="Password" value="" required />
@@ -110,9 +131,23 @@ def _data_page(*, error: str | None, values: dict[str, str] | None = None) -> st
       }});
     </script>
     """
+
+
+def _data_page(*, error: str | None, values: dict[str, str] | None = None) -> str:
+    values = values or {}
+    body = _DATA_BODY_TEMPLATE.format_map(
+        {
+            "error_html": _error_box(error),
+            **{name: _safe(values.get(name)) for name in _DATA_FIELDS},
+        }
+    )
     return _wrap_page(title="Registration - Data", body_html=body)
 
 
+# The blank Step 1 form never varies, so it is rendered and encoded once.
+_EMPTY_DATA_PAGE = _data_page(error=None).encode("utf-8")
+
+
 def _placeholder_page(*, step: int, title: str, reg_id: str, text: str) -> str:
     body = f"""
     <h1>Registration</h1>
@@ -131,73 +166,101 @@ def _placeholder_page(*, step: int, title: str, reg_id: str, text: str) -> str:
     return _wrap_page(title=f"Registration - {title}", body_html=body)
 
 
-def _get_reg(db: Session, reg_id: str) -> RegistrationSession | None:
-    return db.get(RegistrationSession, reg_id)
+_REG_ID_SLOT = "{REG_ID}"
 
 
-def _cancel_and_delete(db: Session, reg: RegistrationSession) -> None:
-    user = db.get(User, reg.user_id)
-    if not user:
-        db.delete(reg)
-        db.commit()
-        return
+def _placeholder_parts(*, step: int, title: str, text: str) -> list[str]:
+    # Render once with a slot marker; callers join the pieces with the escaped reg id.
+    return _placeholder_page(step=step, title=title, reg_id=_REG_ID_SLOT, text=text).split(_REG_ID_SLOT)
+
+
+_EMAIL_STEP_PARTS = _placeholder_parts(
+    step=2,
+    title="Email verification",
+    text="Here comes the email verification step. In a real system we would send a one-time link to confirm account ownership.",
+)
+_TWO_FA_STEP_PARTS = _placeholder_parts(
+    step=3,
+    title="2FA verification",
+    text="Here comes the 2FA step. This would confirm the user via a second factor (TOTP/SMS/Push) to make the account more secure.",
+)
+
 
-    profile = db.query(UserProfile).filter(UserProfile.user_id == user.id).first()
-    if profile:
-        db.delete(profile)
-    db.delete(reg)
-    db.delete(user)
+def _get_reg(db: Session, reg_id: str, *, with_user: bool = False) -> RegistrationSession | None:
+    try:
+        reg_uuid = uuid.UUID(reg_id)
+    except ValueError:  # malformed ids can never match a session
+        return None
+    if not with_user:
+        return db.get(RegistrationSession, reg_uuid)
+    # Fetch the session, its user and the user's profile in one round-trip.
+    stmt = (
+        select(RegistrationSession)
+        .options(joinedload(RegistrationSession.user).joinedload(User.profile))
+        .where(RegistrationSession.id == reg_uuid)
+    )
+    return db.scalar(stmt)
+
+
+def _cancel_and_delete(db: Session, reg: RegistrationSession) -> None:
+    # FKs cascade on delete, so removing the user also removes its profile and registration sessions.
+    db.execute(delete(User).where(User.id == reg.user_id))
     db.commit()
 
 
 @router.get("/desktop/register", response_class=HTMLResponse)
-def register_page() -> str:
-    return _data_page(error=None)
+def register_page() -> HTMLResponse:
+    return HTMLResponse(_EMPTY_DATA_PAGE)
 
 
 @router.post("/desktop/register")
-def register_submit(
+async def register_submit(
+    # Annotated form so the normalizing validator runs; it has no default, hence listed first.
+    email: Annotated[NormalizedEmail, Form()],
     first_name: str = Form(...),
     last_name: str = Form(...),
     address: str = Form(...),
     country: str = Form(...),
-    email: str = Form(...),
     password: str = Form(...),
     db: Session = Depends(get_db),
 ):
-    email_norm = email.strip().lower()
-    if not email_norm:
+    return await run_argon2_bound(partial(_register_submit, email, first_name, last_name, address, country, password, db))
+
+
+def _register_submit(email: str, first_name: str, last_name: str, address: str, country: str, password: str, db: Session):
+    if not email:
         return HTMLResponse(_data_page(error="Email is required."), status_code=status.HTTP_400_BAD_REQUEST)
 
-    existing = db.query(User).filter(User.email == email_norm).first()
-    if existing:
-        vals = {"first_name": first_name, "last_name": last_name, "address": address, "country": country, "email": email_norm}
+    existing_id = db.scalar(select(User.id).where(User.email == email))
+    if existing_id is not None:
+        vals = {"first_name": first_name, "last_name": last_name, "address": address, "country": country, "email": email}
         return HTMLResponse(_data_page(error="Email already registered.", values=vals), status_code=status.HTTP_400_BAD_REQUEST)
 
-    user = User(email=email_norm, password_hash=hash_password(password), role="user")
-    profile = UserProfile(
-        user_id=0,  # set after flush
-        first_name=first_name.strip(),
-        last_name=last_name.strip(),
-        address=address.strip(),
-        country=country.strip(),
+    password_hash = hash_password(password)
+    # Dependents are attached via relationships so a single commit flushes all three rows.
+    reg = RegistrationSession(step=2)
+    user = User(
+        email=email,
+        password_hash=password_hash,
+        role="user",
+        profile=UserProfile(
+            first_name=first_name.strip(),
+            last_name=last_name.strip(),
+            address=address.strip(),
+            country=country.strip(),
+        ),
+        registration_sessions=[reg],
     )
-    reg = RegistrationSession(user_id=0, step=2)
 
     try:
         db.add(user)
-        db.flush()  # assigns user.id
-        profile.user_id = user.id
-        reg.user_id = user.id
-        db.add(profile)
-        db.add(reg)
         db.commit()
     except IntegrityError:
         db.rollback()
-        vals = {"first_name": first_name, "last_name": last_name, "address": address, "country": country, "email": email_norm}
+        vals = {"first_name": first_name, "last_name": last_name, "address": address, "country": country, "email": email}
         return HTMLResponse(_data_page(error="Could not create user (email may already exist).", values=vals), status_code=status.HTTP_400_BAD_REQUEST)
 
-    return RedirectResponse(url=f"/desktop/register/email?reg={reg.id}", status_code=status.HTTP_303_SEE_OTHER)
+    return _see_other(_EMAIL_STEP_URL + str(reg.id))
 
 
 @router.get("/desktop/register/cancel", response_class=HTMLResponse)
@@ -228,27 +291,22 @@ def register_email_page(reg: str, db: Session = Depends(get_db)) -> str:
     if not reg_obj:
         return _wrap_page(title="Registration error", body_html="<h1>Invalid registration session.</h1>")
 
-    return _placeholder_page(
-        step=2,
-        title="Email verification",
-        reg_id=reg_obj.id,
-        text="Here comes the email verification step. In a real system we would send a one-time link to confirm account ownership.",
-    )
+    return str(reg_obj.id).join(_EMAIL_STEP_PARTS)
 
 
 @router.post("/desktop/register/email")
 def register_email_next(reg: str = Form(...), db: Session = Depends(get_db)):
-    reg_obj = _get_reg(db, reg)
+    reg_obj = _get_reg(db, reg, with_user=True)
     if not reg_obj:
         return HTMLResponse(_wrap_page(title="Registration error", body_html="<h1>Invalid registration session.</h1>"), status_code=400)
 
-    user = db.get(User, reg_obj.user_id)
+    user = reg_obj.user
     if user and user.email_verified_at is None:
         user.email_verified_at = dt.datetime.now(dt.timezone.utc)
 
     reg_obj.step = max(reg_obj.step, 3)
     db.commit()
-    return RedirectResponse(url=f"/desktop/register/2fa?reg={reg_obj.id}", status_code=status.HTTP_303_SEE_OTHER)
+    return _see_other(_TWO_FA_STEP_URL + str(reg_obj.id))
 
 
 @router.get("/desktop/register/2fa", response_class=HTMLResponse)
@@ -257,12 +315,7 @@ def register_2fa_page(reg: str, db: Session = Depends(get_db)) -> str:
     if not reg_obj:
         return _wrap_page(title="Registration error", body_html="<h1>Invalid registration session.</h1>")
 
-    return _placeholder_page(
-        step=3,
-        title="2FA verification",
-        reg_id=reg_obj.id,
-        text="Here comes the 2FA step. This would confirm the user via a second factor (TOTP/SMS/Push) to make the account more secure.",
-    )
+    return str(reg_obj.id).join(_TWO_FA_STEP_PARTS)
 
 
 @router.post("/desktop/register/2fa")
@@ -273,10 +326,10 @@ def register_2fa_next(reg: str = Form(...), db: Session = Depends(get_db)):
 
     reg_obj.step = max(reg_obj.step, 4)
     db.commit()
-    return RedirectResponse(url=f"/desktop/register/payment?reg={reg_obj.id}", status_code=status.HTTP_303_SEE_OTHER)
+    return _see_other(_PAYMENT_STEP_URL + str(reg_obj.id))
 
 
-def _stripe_ready() -> tuple[bool, str | None]:
+def _compute_stripe_ready() -> tuple[bool, str | None]:
     if not settings.STRIPE_SECRET_KEY:
         return False, "Stripe is not configured. Set STRIPE_SECRET_KEY in your .env."
     if stripe is None:
@@ -284,6 +337,30 @@ def _stripe_ready() -> tuple[bool, str | None]:
     return True, None
 
 
+# Settings are fixed after boot, so readiness and the API key are resolved once at import.
+_STRIPE_READY, _STRIPE_ERR = _compute_stripe_ready()
+if _STRIPE_READY:
+    stripe.api_key = settings.STRIPE_SECRET_KEY  # type: ignore[union-attr]
+
+
+def _stripe_ready() -> tuple[bool, str | None]:
+    return _STRIPE_READY, _STRIPE_ERR
+
+
+# Checkout payload and price label depend only on settings; Stripe does not mutate line_items.
+_LINE_ITEMS = [
+    {
+        "price_data": {
+            "currency": settings.STRIPE_CURRENCY,
+            "product_data": {"name": settings.STRIPE_PRODUCT_NAME},
+            "unit_amount": settings.STRIPE_UNIT_AMOUNT,
+        },
+        "quantity": 1,
+    }
+]
+_PRICE_LABEL = f"{settings.STRIPE_UNIT_AMOUNT/100:.2f} {html.escape(settings.STRIPE_CURRENCY.upper())}"
+
+
 @router.get("/desktop/register/payment", response_class=HTMLResponse)
 def register_payment_page(reg: str, db: Session = Depends(get_db)) -> str:
     reg_obj = _get_reg(db, reg)
@@ -306,13 +383,13 @@ def register_payment_page(reg: str, db: Session = Depends(get_db)) -> str:
     </div>
 
     <form method="post" action="/desktop/register/payment">
-      <input type="hidden" name="reg" value="{html.escape(reg_obj.id)}" />
+      <input type="hidden" name="reg" value="{reg_obj.id}" />
       <div class="row">
         <button type="submit" {'disabled' if not ready else ''}>Pay with Stripe</button>
-        <a class="btn secondary" href="/desktop/register/cancel?reg={html.escape(reg_obj.id)}">Cancel</a>
-        <a class="btn secondary" href="/desktop/register/review?reg={html.escape(reg_obj.id)}" {'style="opacity:.6; pointer-events:none;"' if not paid else ''}>Next</a>
+        <a class="btn secondary" href="/desktop/register/cancel?reg={reg_obj.id}">Cancel</a>
+        <a class="btn secondary" href="/desktop/register/review?reg={reg_obj.id}" {'style="opacity:.6; pointer-events:none;"' if not paid else ''}>Next</a>
       </div>
-      <div class="muted" style="margin-top:10px;">Price: {settings.STRIPE_UNIT_AMOUNT/100:.2f} {html.escape(settings.STRIPE_CURRENCY.upper())}</div>
+      <div class="muted" style="margin-top:10px;">Price: {_PRICE_LABEL}</div>
     </form>
     """
     return _wrap_page(title="Registration - Payment", body_html=body)
@@ -328,27 +405,16 @@ def register_payment_start(request: Request, reg: str = Form(...), db: Session =
     if not ready:
         return HTMLResponse(_wrap_page(title="Stripe error", body_html=f"<h1>Payment unavailable</h1>{_error_box(stripe_err)}"), status_code=400)
 
-    stripe.api_key = settings.STRIPE_SECRET_KEY  # type: ignore[union-attr]
-
     base = str(request.base_url).rstrip("/") if request else ""
     success_url = f"{base}/desktop/register/payment/success?reg={reg_obj.id}&session_id={{CHECKOUT_SESSION_ID}}"
     cancel_url = f"{base}/desktop/register/cancel?reg={reg_obj.id}"
 
     session = stripe.checkout.Session.create(  # type: ignore[union-attr]
         mode="payment",
-        line_items=[
-            {
-                "price_data": {
-                    "currency": settings.STRIPE_CURRENCY,
-                    "product_data": {"name": settings.STRIPE_PRODUCT_NAME},
-                    "unit_amount": settings.STRIPE_UNIT_AMOUNT,
-                },
-                "quantity": 1,
-            }
-        ],
+        line_items=_LINE_ITEMS,
         success_url=success_url,
         cancel_url=cancel_url,
-        metadata={"registration_id": reg_obj.id, "user_id": str(reg_obj.user_id)},
+        metadata={"registration_id": str(reg_obj.id), "user_id": str(reg_obj.user_id)},
     )
 
     reg_obj.stripe_checkout_session_id = session.get("id")
@@ -357,7 +423,7 @@ def register_payment_start(request: Request, reg: str = Form(...), db: Session =
     url = session.get("url")
     if not url:
         return HTMLResponse(_wrap_page(title="Stripe error", body_html="<h1>Stripe session missing URL.</h1>"), status_code=500)
-    return RedirectResponse(url=url, status_code=status.HTTP_303_SEE_OTHER)
+    return _see_other(url)
 
 
 @router.get("/desktop/register/payment/success", response_class=HTMLResponse)
@@ -373,7 +439,6 @@ def register_payment_success(reg: str, session_id: str | None = None, db: Sessio
     if not session_id:
         return _wrap_page(title="Stripe error", body_html="<h1>Missing Stripe session_id.</h1>")
 
-    stripe.api_key = settings.STRIPE_SECRET_KEY  # type: ignore[union-attr]
     try:
         sess = stripe.checkout.Session.retrieve(session_id)  # type: ignore[union-attr]
     except Exception as e:
@@ -383,7 +448,7 @@ def register_payment_success(reg: str, session_id: str | None = None, db: Sessio
         return _wrap_page(
             title="Payment not completed",
             body_html="<h1>Payment not completed.</h1><div class='row' style='margin-top:18px;'><a class='btn' href='/desktop/register/payment?reg="
-            + html.escape(reg_obj.id)
+            + str(reg_obj.id)
             + "'>Back to payment</a></div>",
         )
 
@@ -392,17 +457,17 @@ def register_payment_success(reg: str, session_id: str | None = None, db: Sessio
     reg_obj.stripe_checkout_session_id = session_id
     db.commit()
 
-    return RedirectResponse(url=f"/desktop/register/review?reg={reg_obj.id}", status_code=status.HTTP_303_SEE_OTHER)
+    return _see_other(_REVIEW_STEP_URL + str(reg_obj.id))
 
 
 @router.get("/desktop/register/review", response_class=HTMLResponse)
 def register_review_page(reg: str, db: Session = Depends(get_db)) -> str:
-    reg_obj = _get_reg(db, reg)
+    reg_obj = _get_reg(db, reg, with_user=True)
     if not reg_obj:
         return _wrap_page(title="Registration error", body_html="<h1>Invalid registration session.</h1>")
 
-    user = db.get(User, reg_obj.user_id)
-    profile = db.query(UserProfile).filter(UserProfile.user_id == reg_obj.user_id).first()
+    user = reg_obj.user
+    profile = user.profile if user else None
     if not user or not profile:
         return _wrap_page(title="Registration error", body_html="<h1>Registration data missing.</h1>")
 
@@ -414,7 +479,7 @@ def register_review_page(reg: str, db: Session = Depends(get_db)) -> str:
     <h2>Account</h2>
     <div class="card">
       <div class="kv">
-        <div>Email</div><div>{html.escape(user.email)}</div>
+        <div>Email</div><div>{_safe(user.email)}</div>
         <div>Email verified</div><div>{'Yes' if user.email_verified_at else 'No (placeholder step)'}</div>
         <div>2FA</div><div>Placeholder (not implemented)</div>
         <div>Payment</div><div>{'PAID' if paid else 'NOT PAID'}</div>
@@ -424,19 +489,19 @@ def register_review_page(reg: str, db: Session = Depends(get_db)) -> str:
     <h2>Profile</h2>
     <div class="card">
       <div class="kv">
-        <div>First name</div><div>{html.escape(profile.first_name)}</div>
-        <div>Last name</div><div>{html.escape(profile.last_name)}</div>
-        <div>Address</div><div>{html.escape(profile.address)}</div>
-        <div>Country</div><div>{html.escape(profile.country)}</div>
+        <div>First name</div><div>{_safe(profile.first_name)}</div>
+        <div>Last name</div><div>{_safe(profile.last_name)}</div>
+        <div>Address</div><div>{_safe(profile.address)}</div>
+        <div>Country</div><div>{_safe(profile.country)}</div>
       </div>
     </div>
 
     <form method="post" action="/desktop/register/complete">
-      <input type="hidden" name="reg" value="{html.escape(reg_obj.id)}" />
+      <input type="hidden" name="reg" value="{reg_obj.id}" />
       <div class="row">
         <button type="submit" {'disabled' if not paid else ''}>Complete</button>
-        <a class="btn secondary" href="/desktop/register/cancel?reg={html.escape(reg_obj.id)}">Cancel</a>
-        <a class="btn secondary" href="/desktop/register/payment?reg={html.escape(reg_obj.id)}">Back</a>
+        <a class="btn secondary" href="/desktop/register/cancel?reg={reg_obj.id}">Cancel</a>
+        <a class="btn secondary" href="/desktop/register/payment?reg={reg_obj.id}">Back</a>
       </div>
       {'<div class=\"muted\" style=\"margin-top:10px;\">Complete is disabled until payment is marked as PAID.</div>' if not paid else ''}
     </form>
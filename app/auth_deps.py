@@ -1,17 +1,15 @@
 from __future__ import annotations
 
-from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from fastapi import Header, HTTPException, status
 
-from .security import decode_access_token
+from .security import JWTPayload, decode_access_token
 
-bearer_scheme = HTTPBearer(auto_error=False)
 
-
-def require_user(creds: HTTPAuthorizationCredentials | None = Depends(bearer_scheme)) -> dict:
-    if not creds:
+def require_user(authorization: str | None = Header(default=None)) -> JWTPayload:
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
     try:
-        return decode_access_token(creds.credentials)
+        return decode_access_token(token)
     except Exception:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
@@ -2,55 +2,133 @@ from __future__ import annotations
 
 import datetime as dt
 
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import Connection, delete, insert, inspect, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
-from .db import Base, SessionLocal, engine
-from .models import User
+from .db import Base, engine
+from .models import APP_SCHEMA_VERSION, Meta, User
+from .schemas import normalize_email
 from .security import hash_password
 from .settings import settings
 
 
-def init_db() -> None:
-    Base.metadata.create_all(bind=engine)
+# Arbitrary key for the Postgres advisory lock that serializes schema creation across workers.
+_INIT_LOCK_KEY = 7_300_001
 
+_SCHEMA_KEY = "schema_version"
+_SEED_MARKER_KEY = "seeded_example_user"
 
-def seed_example_user(*, email: str, password: str, role: str) -> bool:
-    db = SessionLocal()
-    try:
-        existing = db.query(User).filter(User.email == email).first()
-        if existing:
-            return False
+# Dialects with INSERT ... ON CONFLICT support.
+_UPSERT_INSERTS = {"sqlite": sqlite_insert, "postgresql": pg_insert}
 
-        user = User(
-            email=email,
-            password_hash=hash_password(password),
-            role=role,
-            email_verified_at=dt.datetime.now(dt.timezone.utc),
+
+def _lock(conn: Connection) -> None:
+    """Serialize startup across workers; must be the first statement of the transaction."""
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _INIT_LOCK_KEY})
+    elif conn.dialect.name == "sqlite":
+        # pysqlite never emits BEGIN before DDL; take the write lock up front so DDL is transactional too.
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def _read_meta(conn: Connection) -> dict[str, str]:
+    if not inspect(conn).has_table(Meta.__tablename__):
+        return {}
+    rows = conn.execute(select(Meta.key, Meta.value).where(Meta.key.in_((_SCHEMA_KEY, _SEED_MARKER_KEY))))
+    return dict(rows.tuples().all())
+
+
+def _upsert(conn: Connection, table, values: dict, *, update: tuple[str, ...] = ()) -> bool:
+    """INSERT ... ON CONFLICT DO NOTHING (or DO UPDATE of `update`); returns True if a row was written."""
+    make_insert = _UPSERT_INSERTS.get(conn.dialect.name)
+    if make_insert is None:  # pragma: no cover - no ON CONFLICT syntax; fall back to delete + insert
+        if update:
+            conn.execute(delete(table).where(*(c == values[c.name] for c in table.primary_key)))
+        return conn.execute(insert(table).values(**values)).rowcount == 1
+    stmt = make_insert(table).values(**values)
+    pk = [c.name for c in table.primary_key]
+    if update:
+        stmt = stmt.on_conflict_do_update(index_elements=pk, set_={k: stmt.excluded[k] for k in update})
+    else:
+        stmt = stmt.on_conflict_do_nothing()
+    return conn.execute(stmt).rowcount == 1
+
+
+def _set_meta(conn: Connection, key: str, value: str) -> None:
+    _upsert(conn, Meta.__table__, {"key": key, "value": value}, update=("value",))
+
+
+def _ensure_schema(conn: Connection, meta: dict[str, str]) -> None:
+    found = meta.get(_SCHEMA_KEY)
+    if found == str(APP_SCHEMA_VERSION):
+        return
+    # create_all never alters existing tables, so only an empty database may be created and stamped.
+    existing = set(inspect(conn).get_table_names()) & set(Base.metadata.tables)
+    if existing:
+        fix = "migrate the database and run `python stamp_schema.py`"
+        if conn.dialect.name == "sqlite":
+            fix = f"delete the SQLite file ({conn.engine.url.database}) so it is recreated, or {fix}"
+        raise RuntimeError(
+            f"Database schema version is {found or 'unknown'}, expected {APP_SCHEMA_VERSION}. "
+            f"Schema changes are not migrated automatically: {fix}, then restart."
         )
-        db.add(user)
-        db.commit()
-        return True
-    except IntegrityError:
-        db.rollback()
+    Base.metadata.create_all(bind=conn)
+    _set_meta(conn, _SCHEMA_KEY, str(APP_SCHEMA_VERSION))
+
+
+def _seed_user(conn: Connection, *, email: str, password: str, role: str) -> bool:
+    # Look first so warm databases skip the Argon2 hash; ON CONFLICT covers a concurrent insert.
+    if conn.scalar(select(User.id).where(User.email == email)) is not None:
         return False
-    finally:
-        db.close()
+    values = {
+        "email": email,
+        "password_hash": hash_password(password),
+        "role": role,
+        "email_verified_at": dt.datetime.now(dt.timezone.utc),
+    }
+    return _upsert(conn, User.__table__, values)
 
 
-def init_db_and_seed_example_user() -> None:
-    init_db()
+def init_db() -> None:
+    with engine.begin() as conn:
+        _lock(conn)
+        _ensure_schema(conn, _read_meta(conn))
+
+
+def stamp_schema() -> None:
+    """Record APP_SCHEMA_VERSION for a database that was migrated to the current models by hand."""
+    with engine.begin() as conn:
+        _lock(conn)
+        Meta.__table__.create(bind=conn, checkfirst=True)
+        _set_meta(conn, _SCHEMA_KEY, str(APP_SCHEMA_VERSION))
+
+
+def seed_example_user(*, email: str, password: str, role: str) -> bool:
+    with engine.begin() as conn:
+        return _seed_user(conn, email=email, password=password, role=role)
+
 
+def init_db_and_seed_example_user() -> None:
     auto_seed = settings.AUTO_SEED_EXAMPLE_USER
     if auto_seed is None:
         auto_seed = settings.APP_ENV.lower() in {"dev", "local"}
-    if not auto_seed:
-        return
+    email = normalize_email(settings.EXAMPLE_USER_EMAIL) if auto_seed else None
 
-    email = settings.EXAMPLE_USER_EMAIL.strip().lower()
-    created = seed_example_user(
-        email=email,
-        password=settings.EXAMPLE_USER_PASSWORD,
-        role=settings.EXAMPLE_USER_ROLE,
-    )
+    # One transaction; warm starts stop after a single read of the meta rows.
+    with engine.begin() as conn:
+        _lock(conn)
+        meta = _read_meta(conn)
+        _ensure_schema(conn, meta)
+        if email is None or meta.get(_SEED_MARKER_KEY) == email:
+            return
+
+        created = _seed_user(
+            conn,
+            email=email,
+            password=settings.EXAMPLE_USER_PASSWORD,
+            role=settings.EXAMPLE_USER_ROLE,
+        )
+        _set_meta(conn, _SEED_MARKER_KEY, email)
     if created:
         print(f"[seed] Created example user: {email} (role={settings.EXAMPLE_USER_ROLE})")
@@ -1,17 +1,46 @@
 from __future__ import annotations
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
-from .settings import settings
+import threading
+from contextvars import ContextVar
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker, scoped_session, DeclarativeBase
+from sqlalchemy.pool import StaticPool
+from .settings import DATABASE_URL, settings
 
 
 def _engine_kwargs(db_url: str) -> dict:
+    pool = {"pool_size": settings.DB_POOL_SIZE, "max_overflow": settings.DB_MAX_OVERFLOW}
     if db_url.startswith("sqlite"):
-        return {"connect_args": {"check_same_thread": False}}
-    return {}
+        kwargs: dict = {"connect_args": {"check_same_thread": False}}
+        if db_url in {"sqlite://", "sqlite:///:memory:"}:
+            # One shared connection, so every thread sees the same in-memory database.
+            kwargs["poolclass"] = StaticPool
+        else:
+            kwargs.update(pool)
+        return kwargs
+    return {**pool, "pool_recycle": settings.DB_POOL_RECYCLE_S, "pool_pre_ping": True}
+
+
+engine = create_engine(DATABASE_URL, future=True, **_engine_kwargs(DATABASE_URL))
 
+_SQLITE_PRAGMAS = (
+    "journal_mode=WAL",  # readers no longer block the writer
+    "synchronous=NORMAL",  # fsync at checkpoints instead of every commit; safe with WAL
+    "temp_store=MEMORY",
+    "cache_size=-64000",  # ~64 MB page cache
+    "mmap_size=268435456",
+    "foreign_keys=ON",  # FK constraints (incl. ON DELETE CASCADE) are off unless enabled per connection
+)
 
-engine = create_engine(settings.DATABASE_URL, future=True, **_engine_kwargs(settings.DATABASE_URL))
+if DATABASE_URL.startswith("sqlite"):
+
+    @event.listens_for(engine, "connect")
+    def _sqlite_pragmas(dbapi_conn, _record) -> None:
+        cur = dbapi_conn.cursor()
+        for pragma in _SQLITE_PRAGMAS:
+            cur.execute(f"PRAGMA {pragma}")
+        cur.close()
 
 
 class Base(DeclarativeBase):
@@ -20,10 +49,34 @@ class Base(DeclarativeBase):
 
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 
+# Sessions are scoped per request, not per thread: FastAPI may run a dependency and the
+# endpoint on different threadpool workers, but both inherit the request's context.
+_request_scope: ContextVar[object | None] = ContextVar("db_request_scope", default=None)
+SessionScoped = scoped_session(SessionLocal, scopefunc=lambda: _request_scope.get() or threading.get_ident())
+
+
+class DBSessionMiddleware:
+    """Opens a session scope per HTTP request and guarantees cleanup when it ends."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = _request_scope.set(object())
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            SessionScoped.remove()
+            _request_scope.reset(token)
+
 
 def get_db():
-    db = SessionLocal()
+    db = SessionScoped()
     try:
         yield db
     finally:
-        db.close()
+        SessionScoped.remove()
@@ -2,19 +2,74 @@ from __future__ import annotations
 
 import base64
 import hashlib
-import secrets
+import heapq
+import hmac
+import os
+import threading
 import time
 from dataclasses import dataclass
 from typing import Dict, Optional
 
+import msgspec
+
+from .settings import settings
+
+try:
+    import redis  # type: ignore
+except Exception:  # pragma: no cover
+    redis = None  # type: ignore[assignment]
+
+
+# Shape of desktop-supplied state and PKCE challenge values (base64url / token_urlsafe alphabet).
+URLSAFE_TOKEN_PATTERN = r"^[A-Za-z0-9_-]{1,128}$"
+
 
 def _b64url(data: bytes) -> str:
     return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
 
 
+class _EntropyPool:
+    """Serves os.urandom output from a 4 KiB buffer, refilled when it runs out."""
+
+    def __init__(self, size: int = 4096):
+        self._size = size
+        self._buf = b""
+        self._pos = 0
+        self._lock = threading.Lock()
+        # A forked child must never reuse bytes the parent may also hand out.
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self) -> None:
+        # The inherited lock may have been held by a parent thread mid-take(); start with a fresh one.
+        self._lock = threading.Lock()
+        self._buf = b""
+        self._pos = 0
+
+    def take(self, n: int) -> bytes:
+        with self._lock:
+            if self._pos + n > len(self._buf):
+                self._buf = os.urandom(max(self._size, n))
+                self._pos = 0
+            out = self._buf[self._pos : self._pos + n]
+            self._pos += n
+            return out
+
+
+_entropy = _EntropyPool()
+
+
+def _new_code() -> str:
+    # Same shape as token_urlsafe(24): 24 CSPRNG bytes, base64url without padding.
+    return _b64url(_entropy.take(24))
+
+
 def pkce_challenge_from_verifier(verifier: str) -> str:
-    digest = hashlib.sha256(verifier.encode("utf-8")).digest()
-    return _b64url(digest)
+    # RFC 7636 verifiers are ASCII-only; anything else can never match a stored challenge.
+    try:
+        data = verifier.encode("ascii")
+    except UnicodeEncodeError:
+        return ""
+    return _b64url(hashlib.sha256(data).digest())
 
 
 @dataclass
@@ -39,6 +94,8 @@ class DesktopAuthStore:
     """In-memory store for demo purposes (V1).
 
     In production, store pending logins and auth codes in DB/redis with TTL.
+    Expiry is lazy: a min-heap of deadlines is drained from the head on each call,
+    so cleanup is amortized O(log N) instead of rebuilding both dicts.
     """
 
     def __init__(self, pending_ttl_s: int = 600, code_ttl_s: int = 120):
@@ -46,43 +103,116 @@ class DesktopAuthStore:
         self.code_ttl_s = code_ttl_s
         self.pending: Dict[str, PendingLogin] = {}
         self.codes: Dict[str, AuthCode] = {}
+        # (deadline, key, kind) with kind "p" for pending logins and "c" for codes.
+        self._expiry: list[tuple[float, str, str]] = []
+        # Sync routes run on threadpool workers; heap operations must not interleave.
+        self._lock = threading.RLock()
 
     def cleanup(self) -> None:
-        now = time.time()
-        self.pending = {k: v for k, v in self.pending.items() if now - v.created_at < self.pending_ttl_s}
-        self.codes = {k: v for k, v in self.codes.items() if now - v.created_at < self.code_ttl_s and not v.used}
+        with self._lock:
+            now = time.monotonic()
+            while self._expiry and self._expiry[0][0] <= now:
+                _, key, kind = heapq.heappop(self._expiry)
+                entries, ttl = (self.pending, self.pending_ttl_s) if kind == "p" else (self.codes, self.code_ttl_s)
+                entry = entries.get(key)
+                # Same expression as the pushed deadline, so a popped record always matches its entry.
+                # A key re-registered after this deadline was pushed has a later entry of its own.
+                if entry is not None and entry.created_at + ttl <= now:
+                    del entries[key]
 
     def register_pending(self, state: str, redirect_uri: str, code_challenge: str) -> None:
-        self.cleanup()
-        self.pending[state] = PendingLogin(state=state, redirect_uri=redirect_uri, code_challenge=code_challenge, created_at=time.time())
+        with self._lock:
+            self.cleanup()
+            now = time.monotonic()
+            self.pending[state] = PendingLogin(state=state, redirect_uri=redirect_uri, code_challenge=code_challenge, created_at=now)
+            heapq.heappush(self._expiry, (now + self.pending_ttl_s, state, "p"))
 
     def get_pending(self, state: str) -> Optional[PendingLogin]:
-        self.cleanup()
-        return self.pending.get(state)
+        with self._lock:
+            self.cleanup()
+            return self.pending.get(state)
 
     def issue_code(self, state: str, user_id: int) -> AuthCode:
-        self.cleanup()
-        pending = self.pending.get(state)
+        with self._lock:
+            self.cleanup()
+            pending = self.pending.get(state)
+            if not pending:
+                raise ValueError("unknown_state")
+            code = _new_code()
+            now = time.monotonic()
+            auth_code = AuthCode(code=code, user_id=user_id, state=state, code_challenge=pending.code_challenge, created_at=now)
+            self.codes[code] = auth_code
+            heapq.heappush(self._expiry, (now + self.code_ttl_s, code, "c"))
+            return auth_code
+
+    def exchange_code(self, code: str, code_verifier: str) -> int:
+        with self._lock:
+            self.cleanup()
+            auth_code = self.codes.get(code)
+            if not auth_code or auth_code.used:
+                raise ValueError("invalid_code")
+            # Verify PKCE
+            expected = auth_code.code_challenge
+            actual = pkce_challenge_from_verifier(code_verifier)
+            if not hmac.compare_digest(actual, expected):
+                raise ValueError("pkce_failed")
+            # Used codes are dropped right away; the stale heap entry is skipped when it expires.
+            auth_code.used = True
+            del self.codes[code]
+            return auth_code.user_id
+
+
+class RedisDesktopAuthStore:
+    """Redis-backed store: expiry is handled by key TTLs and works across workers.
+
+    Uses a blocking client, so it must only be called from sync (threadpool) routes.
+    """
+
+    def __init__(self, client, pending_ttl_s: int = 600, code_ttl_s: int = 120):
+        self.client = client
+        self.pending_ttl_s = pending_ttl_s
+        self.code_ttl_s = code_ttl_s
+
+    def register_pending(self, state: str, redirect_uri: str, code_challenge: str) -> None:
+        pending = PendingLogin(state=state, redirect_uri=redirect_uri, code_challenge=code_challenge, created_at=time.time())
+        self.client.set(f"pending:{state}", msgspec.json.encode(pending), ex=self.pending_ttl_s)
+
+    def get_pending(self, state: str) -> Optional[PendingLogin]:
+        raw = self.client.get(f"pending:{state}")
+        return msgspec.json.decode(raw, type=PendingLogin) if raw else None
+
+    def issue_code(self, state: str, user_id: int) -> AuthCode:
+        pending = self.get_pending(state)
         if not pending:
             raise ValueError("unknown_state")
-        code = secrets.token_urlsafe(24)
+        code = _new_code()
         auth_code = AuthCode(code=code, user_id=user_id, state=state, code_challenge=pending.code_challenge, created_at=time.time())
-        self.codes[code] = auth_code
+        self.client.set(f"code:{code}", msgspec.json.encode(auth_code), ex=self.code_ttl_s)
         return auth_code
 
     def exchange_code(self, code: str, code_verifier: str) -> int:
-        self.cleanup()
-        auth_code = self.codes.get(code)
-        if not auth_code or auth_code.used:
+        # GETDEL makes the code single-use atomically, so it is consumed even if PKCE fails.
+        raw = self.client.getdel(f"code:{code}")
+        if not raw:
             raise ValueError("invalid_code")
-        # Verify PKCE
-        expected = auth_code.code_challenge
-        actual = pkce_challenge_from_verifier(code_verifier)
-        if actual != expected:
+        auth_code = msgspec.json.decode(raw, type=AuthCode)
+        if not hmac.compare_digest(pkce_challenge_from_verifier(code_verifier), auth_code.code_challenge):
             raise ValueError("pkce_failed")
-        # Mark used
-        auth_code.used = True
         return auth_code.user_id
 
 
-store = DesktopAuthStore()
+def _build_store() -> DesktopAuthStore | RedisDesktopAuthStore:
+    if not settings.REDIS_URL:
+        return DesktopAuthStore()
+    if redis is None:
+        raise RuntimeError("REDIS_URL is set but the redis package is not installed. Install it with: pip install -r requirements.txt")
+    # Bounded timeouts: a stalled Redis fails the request instead of pinning a worker thread.
+    client = redis.Redis.from_url(
+        settings.REDIS_URL,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT_S,
+        socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT_S,
+    )
+    return RedisDesktopAuthStore(client)
+
+
+store = _build_store()
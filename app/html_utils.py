@@ -0,0 +1,11 @@
+from __future__ import annotations
+
+import html
+import re
+
+_HTML_UNSAFE = re.compile(r"[<>&\"']")
+
+
+def escape_if_needed(value: str) -> str:
+    """html.escape that returns the input unchanged when it has nothing to escape."""
+    return html.escape(value) if _HTML_UNSAFE.search(value) else value
@@ -2,20 +2,29 @@ from __future__ import annotations
 
 from contextlib import asynccontextmanager
 
+from anyio import to_thread
 from fastapi import FastAPI
 
 from .api.auth import router as auth_router
 from .api.desktop_login import router as desktop_login_router
 from .api.desktop_register import router as desktop_register_router
 from .bootstrap import init_db_and_seed_example_user
+from .db import DBSessionMiddleware
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
-    init_db_and_seed_example_user()
+    # Blocking DB/hashing work; keep it off the event loop.
+    await to_thread.run_sync(init_db_and_seed_example_user)
     yield
 
-app = FastAPI(title="Architecture Showcase API", version="0.2.0", lifespan=lifespan)
+app = FastAPI(
+    title="Architecture Showcase API",
+    version="0.2.0",
+    lifespan=lifespan,
+)
+
+app.add_middleware(DBSessionMiddleware)
 
 app.include_router(auth_router)
 app.include_router(desktop_login_router)
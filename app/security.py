@@ -1,35 +1,108 @@
 from __future__ import annotations
 
-import datetime as dt
-from typing import Any
+import base64
+import hashlib
+import hmac
+import os
+import time
+from collections.abc import Callable
+from functools import lru_cache
+from typing import Any, NamedTuple, TypeVar
 
-from jose import jwt
-from passlib.context import CryptContext
+import jwt
+import orjson
+from anyio import CapacityLimiter, to_thread
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 
-from .settings import settings
+from .settings import ACCESS_TOKEN_SECS, SECRET_KEY_BYTES, settings
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+_ph = PasswordHasher(
+    time_cost=settings.ARGON2_TIME_COST,
+    memory_cost=settings.ARGON2_MEMORY_COST,
+    parallelism=settings.ARGON2_PARALLELISM,
+)
+# Argon2 work gets its own limiter: at most one hash per core (and cpu_count x ARGON2_MEMORY_COST of RAM).
+# Requests waiting for a slot wait on the event loop instead of occupying FastAPI's default threadpool.
+_argon2_limiter = CapacityLimiter(os.cpu_count() or 1)
 ALGORITHM = "HS256"
+# The header never changes, so its base64url form (with the trailing dot) is computed once.
+_JWT_HEADER_B64 = base64.urlsafe_b64encode(b'{"alg":"HS256","typ":"JWT"}').rstrip(b"=") + b"."
+
+# Dev/local only: remember verify results so the demo login doesn't pay Argon2 on every attempt.
+# Keyed by the plaintext's SHA-256 plus the stored hash, so a hit still requires both values.
+_VERIFY_CACHE_ENABLED = settings.APP_ENV.lower() in {"dev", "local"}
+_VERIFY_CACHE_MAX = 256
+_verify_cache: dict[tuple[bytes, str], bool] = {}
+
+
+class JWTPayload(NamedTuple):
+    sub: int
+    email: str
+    role: str
+    exp: int
+
+
+_T = TypeVar("_T")
 
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return _ph.hash(password)
+
+
+def _verify_argon2(password: str, password_hash: str) -> bool:
+    try:
+        return _ph.verify(password_hash, password)
+    except (VerificationError, InvalidHashError):
+        return False
+
+
+def password_needs_rehash(password_hash: str) -> bool:
+    """True if the hash was made with parameters other than the configured ones."""
+    return _ph.check_needs_rehash(password_hash)
 
 
 def verify_password(password: str, password_hash: str) -> bool:
-    return pwd_context.verify(password, password_hash)
+    if not _VERIFY_CACHE_ENABLED:
+        return _verify_argon2(password, password_hash)
 
+    key = (hashlib.sha256(password.encode("utf-8")).digest(), password_hash)
+    ok = _verify_cache.get(key)
+    if ok is None:
+        ok = _verify_argon2(password, password_hash)
+        if len(_verify_cache) >= _VERIFY_CACHE_MAX:
+            _verify_cache.clear()
+        _verify_cache[key] = ok
+    return ok
+
+
+async def run_argon2_bound(func: Callable[[], _T]) -> _T:
+    """Run a sync callable that hashes or verifies passwords on the Argon2 limiter."""
+    return await to_thread.run_sync(func, limiter=_argon2_limiter)
 
-def create_access_token(subject: str, extra: dict[str, Any] | None = None) -> str:
-    now = dt.datetime.now(dt.timezone.utc)
-    exp = now + dt.timedelta(minutes=settings.ACCESS_TOKEN_MINUTES)
 
-    payload: dict[str, Any] = {"sub": subject, "iat": int(now.timestamp()), "exp": int(exp.timestamp())}
+def create_access_token(subject: str, extra: dict[str, Any] | None = None) -> str:
+    now = int(time.time())
+    payload: dict[str, Any] = {"sub": subject, "iat": now, "exp": now + ACCESS_TOKEN_SECS}
     if extra:
         payload.update(extra)
 
-    return jwt.encode(payload, settings.SECRET_KEY, algorithm=ALGORITHM)
+    # Plain HS256 assembly; decoding still goes through PyJWT.
+    signing_input = _JWT_HEADER_B64 + base64.urlsafe_b64encode(orjson.dumps(payload)).rstrip(b"=")
+    signature = hmac.new(SECRET_KEY_BYTES, signing_input, hashlib.sha256).digest()
+    return (signing_input + b"." + base64.urlsafe_b64encode(signature).rstrip(b"=")).decode("ascii")
+
+
+@lru_cache(maxsize=4096)
+def _decode_cached(token: str, key: bytes) -> JWTPayload:
+    # Keyed on the secret too, so entries signed under a previous key can never be returned.
+    d = jwt.decode(token, key, algorithms=[ALGORITHM], options={"require": ["exp", "iat", "sub"]})
+    return JWTPayload(sub=int(d["sub"]), email=d["email"], role=d["role"], exp=d["exp"])
 
 
-def decode_access_token(token: str) -> dict[str, Any]:
-    return jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+def decode_access_token(token: str) -> JWTPayload:
+    payload = _decode_cached(token, SECRET_KEY_BYTES)
+    # Cached entries outlive the decode-time exp check, so expiry is enforced on every call.
+    if payload.exp <= time.time():
+        raise jwt.ExpiredSignatureError("Signature has expired")
+    return payload
@@ -5,6 +5,7 @@ from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 _BASE_DIR = Path(__file__).resolve().parent.parent
+_WINDOWS_ABS_PATH = re.compile(r"^[A-Za-z]:[\\/]")
 
 
 class Settings(BaseSettings):
@@ -17,6 +18,20 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "dev-secret-change-me"
     ACCESS_TOKEN_MINUTES: int = 30
 
+    # Argon2id parameters for new hashes; existing hashes carry their own and still verify.
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536  # KiB
+    ARGON2_PARALLELISM: int = 4
+
+    # Sized to cover the default threadpool (40 workers) running sync routes concurrently.
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 40
+    DB_POOL_RECYCLE_S: int = 3600
+
+    # Desktop login state/code store; in-process memory when unset (single worker only).
+    REDIS_URL: str | None = None
+    REDIS_SOCKET_TIMEOUT_S: float = 2.0
+
     AUTO_SEED_EXAMPLE_USER: bool | None = None
     EXAMPLE_USER_EMAIL: str = "example@demo.local"
     EXAMPLE_USER_PASSWORD: str = "DemoPass123!"
@@ -37,7 +52,7 @@ class Settings(BaseSettings):
         if path == ":memory:" or path.startswith("file:"):
             return self
 
-        if path.startswith(("/", "\\")) or re.match(r"^[A-Za-z]:[\\\\/]", path):
+        if path.startswith(("/", "\\")) or _WINDOWS_ABS_PATH.match(path):
             return self
 
         abs_path = (_BASE_DIR / Path(path)).resolve()
@@ -46,3 +61,8 @@ class Settings(BaseSettings):
 
 
 settings = Settings()
+
+# Frozen after boot; hot modules import these instead of going through the settings object.
+DATABASE_URL: str = settings.DATABASE_URL
+SECRET_KEY_BYTES: bytes = settings.SECRET_KEY.encode("utf-8")
+ACCESS_TOKEN_SECS: int = settings.ACCESS_TOKEN_MINUTES * 60
@@ -1,13 +1,14 @@
 from __future__ import annotations
 
 from app.bootstrap import init_db, seed_example_user
+from app.schemas import normalize_email
 from app.settings import settings
 
 
 def main():
     init_db()
 
-    email = settings.EXAMPLE_USER_EMAIL.strip().lower()
+    email = normalize_email(settings.EXAMPLE_USER_EMAIL)
     created = seed_example_user(
         email=email,
         password=settings.EXAMPLE_USER_PASSWORD,
@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+from app.bootstrap import stamp_schema
+from app.models import APP_SCHEMA_VERSION
+
+
+def main():
+    # Only run this once the database matches app/models.py; it does not change any tables.
+    stamp_schema()
+    print(f"[schema] Stamped schema version {APP_SCHEMA_VERSION}")
+
+
+if __name__ == "__main__":
+    main()